@@ -7,14 +7,27 @@ and sends customized notifications to a Discord webhook.
 """
 
 import os
+import copy
+import bisect
 import json
 import time
+import hashlib
+import atexit
+import queue
 import logging
 import argparse
+import threading
 import datetime
-import requests
-from typing import Dict, List, Optional, Any
-from dotenv import load_dotenv
+from functools import cached_property
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, List, Optional, Any
+
+# requests and dotenv are imported where they are used: together they take tens
+# of milliseconds to import, which paths that exit early (e.g. on config errors) never need
+if TYPE_CHECKING:
+    import requests
+
+import orjson
 
 # Set up logging
 logging.basicConfig(
@@ -23,11 +36,105 @@ logging.basicConfig(
 )
 logger = logging.getLogger('LiveNotify')
 
+# Bound on pooled keep-alive connections per host
+HTTP_POOL_SIZE = 4
+
+# Cap on how many times the offline polling interval is doubled
+MAX_BACKOFF_DOUBLINGS = 6
+
+MILESTONE_TEMPLATE = "🎉 **Milestone reached!** {viewers} viewers watching {streamer}"
+
+DEFAULT_CONFIG = {
+    "twitch": {
+        "client_id": "",
+        "client_secret": "",
+        "channel_name": ""
+    },
+    "discord": {
+        "webhook_url": ""
+    },
+    "notification": {
+        "message_template": "🔴 **LIVE NOW!** {streamer} is streaming {game}",
+        "content_text": "",
+        "include_title": True,
+        "include_game": True,
+        "include_viewer_count": True,
+        "include_thumbnail": True,
+        "include_channel_link": True,
+        "embed_color": "FF0000",
+        "notify_on_game_change": False
+    },
+    "polling": {
+        "interval_seconds": 60,
+        "offline_check_multiplier": 3,
+        "notification_cooldown_minutes": 15,
+        "max_backoff_seconds": 900
+    },
+    "advanced": {
+        "viewer_milestone_notifications": [50, 100, 500, 1000],
+        "silent_mode": False
+    }
+}
+
+# Environment variables that override config values, as (section, key)
+ENV_MAP = {
+    "TWITCH_CLIENT_ID": ("twitch", "client_id"),
+    "TWITCH_CLIENT_SECRET": ("twitch", "client_secret"),
+    "TWITCH_CHANNEL_NAME": ("twitch", "channel_name"),
+    "DISCORD_WEBHOOK_URL": ("discord", "webhook_url"),
+    "NOTIFICATION_MESSAGE_TEMPLATE": ("notification", "message_template"),
+    "NOTIFICATION_CONTENT_TEXT": ("notification", "content_text"),
+    "NOTIFICATION_INCLUDE_TITLE": ("notification", "include_title"),
+    "NOTIFICATION_INCLUDE_GAME": ("notification", "include_game"),
+    "NOTIFICATION_INCLUDE_VIEWER_COUNT": ("notification", "include_viewer_count"),
+    "NOTIFICATION_INCLUDE_THUMBNAIL": ("notification", "include_thumbnail"),
+    "NOTIFICATION_INCLUDE_CHANNEL_LINK": ("notification", "include_channel_link"),
+    "NOTIFICATION_EMBED_COLOR": ("notification", "embed_color"),
+    "NOTIFICATION_NOTIFY_ON_GAME_CHANGE": ("notification", "notify_on_game_change"),
+    "POLLING_INTERVAL_SECONDS": ("polling", "interval_seconds"),
+    "POLLING_OFFLINE_CHECK_MULTIPLIER": ("polling", "offline_check_multiplier"),
+    "POLLING_NOTIFICATION_COOLDOWN_MINUTES": ("polling", "notification_cooldown_minutes"),
+    "POLLING_MAX_BACKOFF_SECONDS": ("polling", "max_backoff_seconds"),
+    "ADVANCED_VIEWER_MILESTONE_NOTIFICATIONS": ("advanced", "viewer_milestone_notifications"),
+    "ADVANCED_SILENT_MODE": ("advanced", "silent_mode")
+}
+
+# Distinguishes an unset environment variable from one set to ""
+_MISSING = object()
+
+
+def create_session() -> 'requests.Session':
+    """Create an HTTP session that keeps connections alive between polls"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    atexit.register(session.close)
+    return session
+
+
+def _format_http_error(e: 'requests.RequestException') -> str:
+    """Describe a request error, including the response body when there is one"""
+    message = str(e)
+    response = getattr(e, 'response', None)
+    if response is not None:
+        try:
+            message += f" - Details: {orjson.loads(response.content)}"
+        except ValueError:
+            if response.text:
+                message += f" - Response: {response.text[:200]}"
+    return message
+
+
 class TwitchAPI:
     """Handle authentication and API calls to Twitch"""
     
     BASE_URL = "https://api.twitch.tv/helix"
     AUTH_URL = "https://id.twitch.tv/oauth2/token"
+    TOKEN_FILE = "twitch_token.json"
+    MAX_USER_LOGINS = 100  # Helix limit on user_login values per request
     
     def check_network_connectivity(self, timeout=5):
         """Check if the network is available by pinging common DNS servers"""
@@ -56,11 +163,59 @@ class TwitchAPI:
         self.access_token = None
         self.token_expiry = 0
         self.debug_api = debug_api
+        import requests
+        self._requests = requests  # Bound lazily so importing this module stays cheap
+        self.session = create_session()
+        self.session.headers['Client-ID'] = client_id
+        # Last /streams response, reused when the payload has not changed
+        self._etag = None
+        self._last_body_hash = None
+        self._last_streams = {}
+        self.load_token()
+    
+    def load_token(self) -> None:
+        """Load a previously issued access token from disk if it exists"""
+        try:
+            with open(self.TOKEN_FILE, 'rb') as f:
+                data = orjson.loads(f.read())
+            access_token = data['access_token']
+            token_expiry = data['token_expiry']
+        except FileNotFoundError:
+            return
+        except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring invalid token file: {e}")
+            return
+        
+        if (not isinstance(access_token, str) or isinstance(token_expiry, bool) or
+                not isinstance(token_expiry, (int, float))):
+            logger.warning("Ignoring invalid token file: unexpected value types")
+            return
+        
+        self.access_token = access_token
+        self.token_expiry = token_expiry
+        self.session.headers['Authorization'] = f'Bearer {self.access_token}'
+        logger.debug("Loaded cached Twitch access token")
+    
+    def save_token(self) -> None:
+        """Save the current access token to disk so restarts can reuse it"""
+        try:
+            fd = os.open(self.TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            # The mode above only applies on creation; tighten an existing file too
+            # (os.fchmod is unavailable on Windows before Python 3.13)
+            if hasattr(os, 'fchmod'):
+                os.fchmod(fd, 0o600)
+            with open(fd, 'wb') as f:
+                f.write(orjson.dumps({
+                    'access_token': self.access_token,
+                    'token_expiry': self.token_expiry
+                }))
+        except OSError as e:
+            logger.warning(f"Failed to save token file: {e}")
     
     def authenticate(self) -> None:
         """Get OAuth access token from Twitch"""
         if self.access_token and time.time() < self.token_expiry:
-            return  # Token still valid
+            return  # Token still valid (possibly loaded from disk)
         
         try:
             headers = {
@@ -85,28 +240,28 @@ class TwitchAPI:
                         safe_data['client_secret'] = "****"
                 logger.info(f"Auth data (redacted): {safe_data}")
             
-            response = requests.post(self.AUTH_URL, headers=headers, data=data)
+            response = self.session.post(self.AUTH_URL, headers=headers, data=data)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             self.access_token = data['access_token']
             # Set expiry time with a 10-minute buffer
             self.token_expiry = time.time() + data['expires_in'] - 600
+            self.session.headers['Authorization'] = f'Bearer {self.access_token}'
+            self.save_token()
             logger.info("Successfully authenticated with Twitch API")
-        except requests.RequestException as e:
-            error_msg = f"Failed to authenticate with Twitch: {e}"
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_details = e.response.json()
-                    error_msg += f" - Details: {error_details}"
-                except:
-                    if e.response.text:
-                        error_msg += f" - Response: {e.response.text[:200]}"
-            logger.error(error_msg)
+        except self._requests.RequestException as e:
+            logger.error("Failed to authenticate with Twitch: %s", _format_http_error(e))
             raise
     
-    def get_stream_info(self, channel_name: str) -> Optional[Dict[str, Any]]:
-        """Get stream information for a channel with improved retry logic"""
+    def get_streams_info(self, channel_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get stream information for several channels in a single request
+        
+        Returns a dict keyed by lowercased login; channels missing from it are offline.
+        """
+        if len(channel_names) > self.MAX_USER_LOGINS:
+            raise ValueError(f"At most {self.MAX_USER_LOGINS} channels can be checked per request")
+        
         max_retries = 3
         retry_delay = 5  # seconds
         attempt = 0
@@ -115,36 +270,43 @@ class TwitchAPI:
             try:
                 self.authenticate()  # Ensure we have a valid token
                 
-                headers = {
-                    'Client-ID': self.client_id,
-                    'Authorization': f'Bearer {self.access_token}'
-                }
-                
                 request_url = f"{self.BASE_URL}/streams"
-                request_params = {'user_login': channel_name}
+                request_params = [('user_login', name) for name in channel_names]
+                headers = {'If-None-Match': self._etag} if self._etag else None
                 
                 if self.debug_api:
                     logger.info(f"Stream info request to: {request_url}")
-                    logger.info(f"Stream info headers: {headers}")
+                    logger.info(f"Stream info headers: {dict(self.session.headers, **(headers or {}))}")
                     logger.info(f"Stream info params: {request_params}")
                 
-                response = requests.get(
+                response = self.session.get(
                     request_url,
                     headers=headers,
                     params=request_params,
                     timeout=10  # Add a timeout to prevent hanging
                 )
+                if response.status_code == 304:
+                    return self._last_streams  # Not modified since last poll
+                if response.status_code == 401:
+                    # Cached token was revoked; force re-authentication on retry
+                    self.access_token = None
                 response.raise_for_status()
-                data = response.json()
+                self._etag = response.headers.get('ETag')
+                
+                # Skip parsing when the payload is byte-identical to the last one
+                body_hash = hashlib.blake2b(response.content, digest_size=8).digest()
+                if body_hash == self._last_body_hash:
+                    return self._last_streams
                 
-                # If data is empty, stream is offline
-                if not data['data']:
-                    return None
+                data = orjson.loads(response.content)
                 
-                # Return the stream info
-                return data['data'][0]
+                # Channels that are offline are simply absent from the data
+                streams = {item['user_login'].lower(): item for item in data['data']}
+                self._last_body_hash = body_hash
+                self._last_streams = streams
+                return streams
             
-            except requests.exceptions.ConnectionError as e:
+            except self._requests.exceptions.ConnectionError as e:
                 attempt += 1
                 if "Failed to resolve" in str(e) or "NameResolutionError" in str(e):
                     logger.warning(f"DNS resolution error (attempt {attempt}/{max_retries}): {e}")
@@ -157,18 +319,10 @@ class TwitchAPI:
                     retry_delay *= 2  # Exponential backoff
                 else:
                     logger.error(f"Error fetching stream info after {max_retries} attempts: {e}")
-                    return None
+                    return {}
                     
-            except requests.RequestException as e:
-                error_msg = f"Error fetching stream info: {e}"
-                if hasattr(e, 'response') and e.response is not None:
-                    try:
-                        error_details = e.response.json()
-                        error_msg += f" - Details: {error_details}"
-                    except:
-                        if e.response.text:
-                            error_msg += f" - Response: {e.response.text[:200]}"
-                logger.error(error_msg)
+            except self._requests.RequestException as e:
+                logger.error("Error fetching stream info: %s", _format_http_error(e))
                 
                 attempt += 1
                 if attempt < max_retries:
@@ -176,7 +330,7 @@ class TwitchAPI:
                     time.sleep(retry_delay)
                     retry_delay *= 2  # Exponential backoff
                 else:
-                    return None
+                    return {}
 
 
 class TwitchStreamInfo:
@@ -190,110 +344,214 @@ class TwitchStreamInfo:
         self.title = data['title']
         self.viewer_count = data['viewer_count']
         self.started_at = data['started_at']
-        # Add timestamp to thumbnail URL for cache busting
-        self.thumbnail_url = data['thumbnail_url'].replace('{width}', '1280').replace('{height}', '720') + f"?t={int(time.time())}"
+        self._thumbnail_template = data['thumbnail_url']
         self.language = data['language']
         self.url = f"https://twitch.tv/{data['user_login']}"
     
+    @cached_property
+    def _start_dt(self) -> datetime.datetime:
+        """Stream start time, parsed on first use"""
+        return datetime.datetime.fromisoformat(self.started_at.replace('Z', '+00:00'))
+    
+    @cached_property
+    def thumbnail_url(self) -> str:
+        """Full-size thumbnail URL, built on first use with a cache-busting timestamp"""
+        return self._thumbnail_template.replace('{width}', '1280').replace('{height}', '720') + f"?t={int(time.time())}"
+    
     def format_message(self, template: str) -> str:
         """Replace placeholders in template with actual stream data"""
-        return template.format(
-            streamer=self.user_name,
-            title=self.title,
-            game=self.game_name,
-            viewers=self.viewer_count,
-            url=self.url
-        )
+        return template.format_map({
+            'streamer': self.user_name,
+            'title': self.title,
+            'game': self.game_name,
+            'viewers': self.viewer_count,
+            'url': self.url
+        })
     
     def uptime(self) -> str:
         """Calculate stream uptime"""
-        start_time = datetime.datetime.fromisoformat(self.started_at.replace('Z', '+00:00'))
-        now = datetime.datetime.now(datetime.timezone.utc)
-        delta = now - start_time
+        delta = datetime.datetime.now(datetime.timezone.utc) - self._start_dt
         
-        hours, remainder = divmod(delta.seconds, 3600)
+        # total_seconds() rather than .seconds, which wraps after 24 hours; clamp at
+        # zero so a start time slightly ahead of the local clock doesn't go negative
+        total = max(0, int(delta.total_seconds()))
+        hours, remainder = divmod(total, 3600)
         minutes, _ = divmod(remainder, 60)
         
         return f"{hours}h {minutes}m"
+
+
+class DiscordNotifier:
+    """Handle sending messages to Discord webhook"""
+    
+    EMBED_FOOTER = {"text": "Twitch Stream Notification"}
+    MAX_RATE_LIMIT_RETRIES = 3
+    
+    def __init__(self, webhook_url: str, config: Dict[str, Any]):
+        self.webhook_url = webhook_url
+        import requests
+        self._requests = requests  # Bound lazily so importing this module stays cheap
+        self.session = create_session()
+        self.session.headers['Content-Type'] = 'application/json'
+        # Monotonic time before which the webhook's rate-limit bucket is exhausted
+        self._rate_limit_reset = 0.0
         
-    def format_discord_embed(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        # Embed settings are fixed for the lifetime of the process
+        notification = config['notification']
+        self.message_template = notification['message_template']
+        self.content_text = notification.get('content_text', '')
+        self.include_title = notification['include_title']
+        self.include_game = notification['include_game']
+        self.include_viewer_count = notification['include_viewer_count']
+        self.include_thumbnail = notification['include_thumbnail']
+        self.embed_color = int(notification.get('embed_color', 'FF0000'), 16)
+    
+    def format_discord_embed(self, stream_info: TwitchStreamInfo, message_template: str) -> Dict[str, Any]:
         """Create a rich Discord embed with stream information"""
         embed = {
-            "title": self.title if config['notification']['include_title'] else f"{self.user_name} is live on Twitch!",
+            "title": stream_info.title if self.include_title else f"{stream_info.user_name} is live on Twitch!",
             "type": "rich",
-            "description": self.format_message(config['notification']['message_template']),
-            "url": self.url,
-            "color": int(config['notification']['embed_color'], 16) if 'embed_color' in config['notification'] else 0xFF0000,
+            "description": stream_info.format_message(message_template),
+            "url": stream_info.url,
+            "color": self.embed_color,
             "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-            "footer": {
-                "text": "Twitch Stream Notification"
-            },
+            "footer": self.EMBED_FOOTER,
             "fields": []
         }
         
         # Add fields based on configuration
-        if config['notification']['include_game'] and self.game_name:
+        if self.include_game and stream_info.game_name:
             embed["fields"].append({
                 "name": "Game",
-                "value": self.game_name,
+                "value": stream_info.game_name,
                 "inline": True
             })
         
-        if config['notification']['include_viewer_count']:
+        if self.include_viewer_count:
             embed["fields"].append({
                 "name": "Viewers",
-                "value": str(self.viewer_count),
+                "value": str(stream_info.viewer_count),
                 "inline": True
             })
             
         embed["fields"].append({
             "name": "Uptime",
-            "value": self.uptime(),
+            "value": stream_info.uptime(),
             "inline": True
         })
             
         # Add thumbnail if configured
-        if config['notification']['include_thumbnail']:
-            embed["image"] = {"url": self.thumbnail_url}
+        if self.include_thumbnail:
+            embed["image"] = {"url": stream_info.thumbnail_url}
             
         return embed
-
-
-class DiscordNotifier:
-    """Handle sending messages to Discord webhook"""
     
-    def __init__(self, webhook_url: str):
-        self.webhook_url = webhook_url
+    def post_with_rate_limit(self, body: bytes) -> 'requests.Response':
+        """POST to the webhook, waiting out Discord rate limits
+        
+        Blocks the calling thread (the SendWorker) rather than dropping the message.
+        """
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+            # Wait if a previous response said the bucket was exhausted
+            delay = self._rate_limit_reset - time.monotonic()
+            if delay > 0:
+                logger.info(f"Discord rate limit bucket exhausted, waiting {delay:.1f} seconds")
+                time.sleep(delay)
+            
+            response = self.session.post(self.webhook_url, data=body, timeout=10)
+            
+            if response.status_code != 429:
+                break
+            
+            try:
+                retry_after = float(orjson.loads(response.content).get('retry_after', 1))
+            except (ValueError, TypeError, AttributeError):
+                try:
+                    retry_after = float(response.headers.get('Retry-After', 1))
+                except ValueError:
+                    retry_after = 1.0
+            
+            if attempt < self.MAX_RATE_LIMIT_RETRIES:
+                logger.warning(f"Discord rate limit hit (attempt {attempt + 1}/{self.MAX_RATE_LIMIT_RETRIES}), retrying in {retry_after} seconds")
+                time.sleep(retry_after)
+        
+        try:
+            if int(response.headers.get('X-RateLimit-Remaining', '1')) == 0:
+                reset_after = float(response.headers.get('X-RateLimit-Reset-After', 1))
+                self._rate_limit_reset = time.monotonic() + reset_after
+        except ValueError:
+            pass
+        
+        return response
     
-    def send_notification(self, stream_info: TwitchStreamInfo, config: Dict[str, Any]) -> bool:
-        """Send a notification to Discord about the stream"""
+    def send_notification(self, stream_info: TwitchStreamInfo, template_override: Optional[str] = None) -> bool:
+        """Send a notification to Discord about the stream
+        
+        template_override replaces the configured message template for this send only.
+        """
         if not self.webhook_url:
             logger.error("Discord webhook URL is not configured")
             return False
             
-        embed = stream_info.format_discord_embed(config)
+        embed = self.format_discord_embed(stream_info, template_override or self.message_template)
         
         payload = {
             "embeds": [embed]
         }
         
         # Add content message if specified (appears above embed)
-        if 'content_text' in config['notification'] and config['notification']['content_text']:
-            payload["content"] = stream_info.format_message(config['notification']['content_text'])
+        if self.content_text:
+            payload["content"] = stream_info.format_message(self.content_text)
         
         try:
-            response = requests.post(
-                self.webhook_url,
-                json=payload
-            )
+            response = self.post_with_rate_limit(orjson.dumps(payload))
             response.raise_for_status()
             logger.info(f"Successfully sent Discord notification for {stream_info.user_name}")
             return True
-        except requests.RequestException as e:
-            logger.error(f"Failed to send Discord notification: {e}")
+        except self._requests.RequestException as e:
+            logger.error("Failed to send Discord notification: %s", _format_http_error(e))
             return False
 
 
+class SendWorker(threading.Thread):
+    """Send queued Discord notifications on a background thread
+    
+    Keeps the polling loop independent of webhook latency and rate-limit waits.
+    """
+    
+    STOP_TIMEOUT = 10  # seconds
+    
+    def __init__(self, notifier: DiscordNotifier):
+        super().__init__(name='discord-send', daemon=True)
+        self.notifier = notifier
+        self.queue = queue.Queue()
+    
+    def submit(self, stream_info: TwitchStreamInfo, template_override: Optional[str] = None) -> None:
+        """Queue a notification to be sent in the background"""
+        self.queue.put((stream_info, template_override))
+    
+    def stop(self) -> None:
+        """Stop the worker once queued notifications are sent, waiting at most STOP_TIMEOUT seconds"""
+        self.queue.put(None)
+        self.join(timeout=self.STOP_TIMEOUT)
+        if self.is_alive():
+            # Daemon thread: anything still pending is dropped when the process exits
+            logger.warning("Discord notifications still pending at shutdown were not sent")
+    
+    def run(self) -> None:
+        """Send queued notifications until stop() is called"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            
+            stream_info, template_override = item
+            try:
+                self.notifier.send_notification(stream_info, template_override)
+            except Exception as e:
+                logger.error(f"Unexpected error sending Discord notification: {e}")
+
+
 class StreamState:
     """Track the state of a stream and determine when to notify"""
     
@@ -303,16 +561,20 @@ class StreamState:
         self.last_title = None
         self.last_notification_time = 0
         self.triggered_milestones = set()
-        self.config = config
+        self.offline_streak = 0  # Consecutive offline polls, not persisted
+        self._sorted_milestones = sorted(config['advanced'].get('viewer_milestone_notifications', []))
+        self._cooldown = int(config['polling'].get('notification_cooldown_minutes', 15)) * 60
+        self._notify_game_change = bool(config['notification'].get('notify_on_game_change', False))
         self.state_file = "stream_state.json"
         self.load_state()
+        self._last_persisted = self.persisted_fields()
     
     def load_state(self) -> None:
         """Load previous state from file if it exists"""
         if os.path.exists(self.state_file):
             try:
-                with open(self.state_file, 'r') as f:
-                    data = json.load(f)
+                with open(self.state_file, 'rb') as f:
+                    data = orjson.loads(f.read())
                     self.last_online = data.get('last_online', False)
                     self.last_game = data.get('last_game')
                     self.last_title = data.get('last_title')
@@ -322,28 +584,53 @@ class StreamState:
             except Exception as e:
                 logger.warning(f"Failed to load state file: {e}")
     
-    def save_state(self) -> None:
-        """Save current state to file"""
+    def persisted_fields(self) -> tuple:
+        """Snapshot of the fields written to the state file, for change detection"""
+        return (
+            self.last_online,
+            self.last_game,
+            self.last_title,
+            self.last_notification_time,
+            frozenset(self.triggered_milestones)
+        )
+    
+    def save_state(self) -> bool:
+        """Save current state to file, returning whether the write succeeded"""
+        payload = orjson.dumps({
+            'last_online': self.last_online,
+            'last_game': self.last_game,
+            'last_title': self.last_title,
+            'last_notification_time': self.last_notification_time,
+            'triggered_milestones': sorted(self.triggered_milestones)
+        })
+        
+        # Write to a temporary file and rename it so a crash never leaves a partial file
+        tmp_file = f"{self.state_file}.tmp"
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump({
-                    'last_online': self.last_online,
-                    'last_game': self.last_game,
-                    'last_title': self.last_title,
-                    'last_notification_time': self.last_notification_time,
-                    'triggered_milestones': list(self.triggered_milestones)
-                }, f)
+            with open(tmp_file, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.state_file)
+            return True
         except Exception as e:
             logger.warning(f"Failed to save state file: {e}")
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            return False
     
     def should_send_notification(self, stream_info: Optional[TwitchStreamInfo]) -> bool:
         """Determine if a notification should be sent based on current state"""
+        if stream_info is None:
+            return False
+            
         current_time = time.time()
-        cooldown = self.config['polling'].get('notification_cooldown_minutes', 15) * 60
         
         # Check if stream went from offline to online
-        if stream_info and not self.last_online:
-            if current_time - self.last_notification_time > cooldown:
+        if not self.last_online:
+            if current_time - self.last_notification_time > self._cooldown:
                 self.last_notification_time = current_time
                 return True
             else:
@@ -351,10 +638,9 @@ class StreamState:
                 return False
         
         # Check for game change notification if enabled
-        if (stream_info and self.last_online and 
-            self.config['notification'].get('notify_on_game_change', False) and
+        if (self._notify_game_change and
             stream_info.game_name != self.last_game and
-            current_time - self.last_notification_time > cooldown):
+            current_time - self.last_notification_time > self._cooldown):
             self.last_notification_time = current_time
             return True
             
@@ -365,11 +651,10 @@ class StreamState:
         if not stream_info:
             return False
             
-        milestones = self.config['advanced'].get('viewer_milestone_notifications', [])
-        
-        for milestone in sorted(milestones):
-            if (stream_info.viewer_count >= milestone and 
-                milestone not in self.triggered_milestones):
+        # Only milestones at or below the current viewer count can be newly reached
+        reached = bisect.bisect_right(self._sorted_milestones, stream_info.viewer_count)
+        for milestone in islice(self._sorted_milestones, reached):
+            if milestone not in self.triggered_milestones:
                 self.triggered_milestones.add(milestone)
                 return True
                 
@@ -382,16 +667,36 @@ class StreamState:
         if stream_info:
             self.last_game = stream_info.game_name
             self.last_title = stream_info.title
+            self.offline_streak = 0
         else:
             # Reset milestones when stream goes offline
             self.triggered_milestones = set()
-            
-        self.save_state()
+            self.offline_streak += 1
+        
+        # Most polls change nothing; only touch the disk when a persisted field did.
+        # The snapshot is recorded only after a successful write so failures are retried.
+        current = self.persisted_fields()
+        if current != self._last_persisted and self.save_state():
+            self._last_persisted = current
+
+
+def coerce_config_value(default: Any, value: Any) -> Any:
+    """Convert a file or environment value to the type of its default"""
+    if isinstance(default, bool):
+        return str(value).lower() == "true"
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, list):
+        if isinstance(value, str):
+            value = value.split(",")
+        return [int(x) for x in value if str(x).strip()]
+    return value
 
 
 def load_config(config_path: str = "config.json") -> Dict[str, Any]:
     """Load configuration from JSON file and environment variables"""
     # Load environment variables from .env file if it exists
+    from dotenv import load_dotenv
     load_dotenv()
     
     # First, load config from file if it exists
@@ -406,43 +711,19 @@ def load_config(config_path: str = "config.json") -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"Failed to load config file: {e}")
     
-    # Define the final config with defaults from file config first
-    config = {
-        "twitch": {
-            "client_id": os.environ.get("TWITCH_CLIENT_ID", file_config.get("twitch", {}).get("client_id", "")),
-            "client_secret": os.environ.get("TWITCH_CLIENT_SECRET", file_config.get("twitch", {}).get("client_secret", "")),
-            "channel_name": os.environ.get("TWITCH_CHANNEL_NAME", file_config.get("twitch", {}).get("channel_name", ""))
-        },
-        "discord": {
-            "webhook_url": os.environ.get("DISCORD_WEBHOOK_URL", file_config.get("discord", {}).get("webhook_url", ""))
-        },
-        "notification": {
-            "message_template": os.environ.get(
-                "NOTIFICATION_MESSAGE_TEMPLATE", 
-                file_config.get("notification", {}).get("message_template", "🔴 **LIVE NOW!** {streamer} is streaming {game}")
-            ),
-            "content_text": os.environ.get("NOTIFICATION_CONTENT_TEXT", file_config.get("notification", {}).get("content_text", "")),
-            "include_title": os.environ.get("NOTIFICATION_INCLUDE_TITLE", str(file_config.get("notification", {}).get("include_title", True))).lower() == "true",
-            "include_game": os.environ.get("NOTIFICATION_INCLUDE_GAME", str(file_config.get("notification", {}).get("include_game", True))).lower() == "true",
-            "include_viewer_count": os.environ.get("NOTIFICATION_INCLUDE_VIEWER_COUNT", str(file_config.get("notification", {}).get("include_viewer_count", True))).lower() == "true",
-            "include_thumbnail": os.environ.get("NOTIFICATION_INCLUDE_THUMBNAIL", str(file_config.get("notification", {}).get("include_thumbnail", True))).lower() == "true",
-            "include_channel_link": os.environ.get("NOTIFICATION_INCLUDE_CHANNEL_LINK", str(file_config.get("notification", {}).get("include_channel_link", True))).lower() == "true",
-            "embed_color": os.environ.get("NOTIFICATION_EMBED_COLOR", file_config.get("notification", {}).get("embed_color", "FF0000")),
-            "notify_on_game_change": os.environ.get("NOTIFICATION_NOTIFY_ON_GAME_CHANGE", str(file_config.get("notification", {}).get("notify_on_game_change", False))).lower() == "true"
-        },
-        "polling": {
-            "interval_seconds": int(os.environ.get("POLLING_INTERVAL_SECONDS", str(file_config.get("polling", {}).get("interval_seconds", 60)))),
-            "offline_check_multiplier": int(os.environ.get("POLLING_OFFLINE_CHECK_MULTIPLIER", str(file_config.get("polling", {}).get("offline_check_multiplier", 3)))),
-            "notification_cooldown_minutes": int(os.environ.get("POLLING_NOTIFICATION_COOLDOWN_MINUTES", str(file_config.get("polling", {}).get("notification_cooldown_minutes", 15))))
-        },
-        "advanced": {
-            "viewer_milestone_notifications": [int(x) for x in os.environ.get(
-                "ADVANCED_VIEWER_MILESTONE_NOTIFICATIONS", 
-                ",".join(str(x) for x in file_config.get("advanced", {}).get("viewer_milestone_notifications", [50, 100, 500, 1000]))
-            ).split(",") if x.strip()],
-            "silent_mode": os.environ.get("ADVANCED_SILENT_MODE", str(file_config.get("advanced", {}).get("silent_mode", False))).lower() == "true"
-        }
-    }
+    # Start from the defaults, then overlay the file, then the environment
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    
+    for section, defaults in DEFAULT_CONFIG.items():
+        file_section = file_config.get(section, {})
+        for key, default in defaults.items():
+            if key in file_section:
+                config[section][key] = coerce_config_value(default, file_section[key])
+    
+    for env_key, (section, key) in ENV_MAP.items():
+        value = os.environ.get(env_key, _MISSING)
+        if value is not _MISSING:
+            config[section][key] = coerce_config_value(DEFAULT_CONFIG[section][key], value)
     
     logger.info("Final configuration: Environment variables override file configuration")
     return config
@@ -486,7 +767,7 @@ def main():
         debug_api
     )
     
-    discord_notifier = DiscordNotifier(config['discord']['webhook_url'])
+    discord_notifier = DiscordNotifier(config['discord']['webhook_url'], config)
     stream_state = StreamState(config)
     
     # Test notification if requested
@@ -505,11 +786,15 @@ def main():
             "language": "en"
         }
         test_stream = TwitchStreamInfo(test_data)
-        discord_notifier.send_notification(test_stream, config)
+        discord_notifier.send_notification(test_stream)
         return 0
     
     logger.info(f"Starting monitor for channel: {config['twitch']['channel_name']}")
     
+    # Discord sends run on a worker thread so a slow webhook never delays the next Twitch poll
+    send_worker = SendWorker(discord_notifier)
+    send_worker.start()
+    
     try:
         while True:
             try:
@@ -520,7 +805,10 @@ def main():
                     continue
                     
                 # Check if stream is online
-                stream_data = twitch_api.get_stream_info(config['twitch']['channel_name'])
+                channel_name = config['twitch']['channel_name']
+                streams = twitch_api.get_streams_info([channel_name])
+                stream_data = streams.get(channel_name.lower())
+                stream_info = None
                 
                 if stream_data:
                     stream_info = TwitchStreamInfo(stream_data)
@@ -531,28 +819,30 @@ def main():
                         silent_mode = config['advanced'].get('silent_mode', False)
                         
                         if not silent_mode:
-                            discord_notifier.send_notification(stream_info, config)
+                            send_worker.submit(stream_info)
                         else:
                             logger.info("Silent mode enabled, not sending notification")
                     
                     # Check for viewer milestones
                     if stream_state.should_send_milestone_notification(stream_info):
                         if not config['advanced'].get('silent_mode', False):
-                            milestone_config = config.copy()
-                            milestone_config['notification']['message_template'] = f"🎉 **Milestone reached!** {stream_info.viewer_count} viewers watching {stream_info.user_name}"
-                            discord_notifier.send_notification(stream_info, milestone_config)
+                            send_worker.submit(stream_info, template_override=MILESTONE_TEMPLATE)
                 else:
                     logger.debug(f"Stream offline: {config['twitch']['channel_name']}")
                 
                 # Update state
-                stream_state.update_state(stream_info if stream_data else None)
+                stream_state.update_state(stream_info)
                 
                 # Sleep for the configured interval
                 interval = config['polling']['interval_seconds']
                 
-                # If stream is offline and multiplier is set, poll less frequently
-                if not stream_data and 'offline_check_multiplier' in config['polling']:
-                    interval *= config['polling']['offline_check_multiplier']
+                # If stream is offline, poll less frequently and back off
+                # exponentially the longer it stays offline
+                if not stream_data:
+                    interval *= config['polling'].get('offline_check_multiplier', 1)
+                    doublings = min(stream_state.offline_streak - 1, MAX_BACKOFF_DOUBLINGS)
+                    max_backoff = max(config['polling'].get('max_backoff_seconds', 900), interval)
+                    interval = min(interval * 2 ** doublings, max_backoff)
                     
                 logger.debug(f"Sleeping for {interval} seconds")
                 time.sleep(interval)
@@ -565,6 +855,9 @@ def main():
     except KeyboardInterrupt:
         logger.info("Notifier stopped by user")
         return 0
+    finally:
+        # Let queued notifications finish before exiting
+        send_worker.stop()
 
 
 if __name__ == "__main__":